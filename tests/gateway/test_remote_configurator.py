@@ -0,0 +1,247 @@
+#      Copyright 2023. ThingsBoard
+#  #
+#      Licensed under the Apache License, Version 2.0 (the "License");
+#      you may not use this file except in compliance with the License.
+#      You may obtain a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#      Unless required by applicable law or agreed to in writing, software
+#      distributed under the License is distributed on an "AS IS" BASIS,
+#      WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#      See the License for the specific language governing permissions and
+#      limitations under the License.
+
+import os
+import stat
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from thingsboard_gateway.tb_utility import tb_gateway_remote_configurator
+from thingsboard_gateway.tb_utility.tb_gateway_remote_configurator import RemoteConfigurator, _atomic_write_json, \
+    _canon_hash
+from thingsboard_gateway.tb_utility.tb_json import loads
+
+
+class TestAtomicWriteJson(unittest.TestCase):
+    def test_writes_new_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, 'test.json')
+            _atomic_write_json(file_path, {'name': 'test'})
+
+            with open(file_path, 'rb') as file:
+                self.assertEqual(loads(file.read()), {'name': 'test'})
+            self.assertEqual(os.listdir(tmp_dir), ['test.json'])
+
+    def test_preserves_mode_of_replaced_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, 'test.json')
+            _atomic_write_json(file_path, {'version': 1})
+            os.chmod(file_path, 0o600)
+
+            _atomic_write_json(file_path, {'version': 2})
+
+            self.assertEqual(stat.S_IMODE(os.stat(file_path).st_mode), 0o600)
+            with open(file_path, 'rb') as file:
+                self.assertEqual(loads(file.read()), {'version': 2})
+
+    def test_keeps_original_file_on_failure(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, 'test.json')
+            _atomic_write_json(file_path, {'version': 1})
+
+            with patch.object(tb_gateway_remote_configurator.os, 'replace', side_effect=OSError('replace failed')):
+                with self.assertRaises(OSError):
+                    _atomic_write_json(file_path, {'version': 2})
+
+            with open(file_path, 'rb') as file:
+                self.assertEqual(loads(file.read()), {'version': 1})
+            self.assertEqual(os.listdir(tmp_dir), ['test.json'])
+
+
+class TestCanonHash(unittest.TestCase):
+    def test_key_order_independent(self):
+        self.assertEqual(_canon_hash({'a': 1, 'b': {'c': 2, 'd': 3}}), _canon_hash({'b': {'d': 3, 'c': 2}, 'a': 1}))
+
+    def test_different_content(self):
+        self.assertNotEqual(_canon_hash({'a': 1}), _canon_hash({'a': 2}))
+        self.assertNotEqual(_canon_hash([1, 2]), _canon_hash([2, 1]))
+
+
+class TestRemoteConfigurator(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = TemporaryDirectory()
+        self.config_path = self._tmp_dir.name + path.sep
+        self.gateway = MagicMock()
+        self.gateway.get_config_path.return_value = self.config_path
+        self.gateway.connectors_configs = {}
+        self.config = {
+            'thingsboard': {'host': 'localhost', 'port': 1883, 'security': {'accessToken': 'token'}, 'qos': 1,
+                            'statistics': {'enable': True, 'statsSendPeriodInSeconds': 3600}},
+            'storage': {'type': 'memory'},
+            'grpc': {'enabled': False},
+            'connectors': []
+        }
+        with self.assertLogs('service', level='ERROR'):
+            # logs.json doesn't exist in the test folder
+            self.remote_configurator = RemoteConfigurator(self.gateway, self.config)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_literal_and_pattern_handlers_dispatch(self):
+        general_handler = MagicMock()
+        connector_handler = MagicMock()
+        self.remote_configurator._handlers = {'general_configuration': general_handler}
+        self.remote_configurator._pattern_handlers = [
+            (tb_gateway_remote_configurator.CONNECTOR_ATTRIBUTE_NAME_PATTERN, connector_handler)]
+
+        self.remote_configurator.process_config_request({'general_configuration': {'host': 'localhost'},
+                                                         'MQTT Connector': {'name': 'MQTT Connector'}})
+
+        general_handler.assert_called_once_with({'host': 'localhost'})
+        connector_handler.assert_called_once_with({'name': 'MQTT Connector'})
+
+
+    def _mark_config_dirty(self, _):
+        self.remote_configurator._config_dirty = True
+
+    def test_general_config_saved_once_per_request(self):
+        self.remote_configurator._handlers = {'storage_configuration': MagicMock(side_effect=self._mark_config_dirty),
+                                              'grpc_configuration': MagicMock(side_effect=self._mark_config_dirty)}
+
+        with patch.object(tb_gateway_remote_configurator, '_atomic_write_json') as atomic_write_json:
+            self.remote_configurator.process_config_request({'storage_configuration': {'type': 'memory'},
+                                                             'grpc_configuration': {'enabled': False}})
+
+        atomic_write_json.assert_called_once()
+        self.assertEqual(atomic_write_json.call_args[0][0], self.config_path + 'tb_gateway.json')
+        self.assertFalse(self.remote_configurator._config_dirty)
+
+    def test_general_config_saved_when_later_handler_fails(self):
+        self.remote_configurator._handlers = {'storage_configuration': MagicMock(side_effect=self._mark_config_dirty),
+                                              'grpc_configuration': MagicMock(side_effect=KeyError('enabled'))}
+
+        with patch.object(tb_gateway_remote_configurator, '_atomic_write_json') as atomic_write_json, \
+                self.assertLogs('service', level='ERROR'):
+            self.remote_configurator.process_config_request({'storage_configuration': {'type': 'memory'},
+                                                             'grpc_configuration': {}})
+
+        atomic_write_json.assert_called_once()
+        self.assertFalse(self.remote_configurator._config_dirty)
+        self.assertFalse(self.remote_configurator.in_process)
+
+    def test_general_config_not_saved_without_changes(self):
+        self.remote_configurator._handlers = {'RemoteLoggingLevel': MagicMock()}
+
+        with patch.object(tb_gateway_remote_configurator, '_atomic_write_json') as atomic_write_json:
+            self.remote_configurator.process_config_request({'RemoteLoggingLevel': 'DEBUG'})
+
+        atomic_write_json.assert_not_called()
+
+
+    def test_missing_provisioning_is_not_connection_change(self):
+        config = {**self.config['thingsboard'], 'provisioning': {}}
+        self.assertFalse(self.remote_configurator._is_general_configuration_section_changed('connection', config))
+
+        config['host'] = 'thingsboard.cloud'
+        self.assertTrue(self.remote_configurator._is_general_configuration_section_changed('connection', config))
+
+
+    def test_connectors_index_updated_on_create_and_delete(self):
+        self.remote_configurator._handle_connector_configuration_update({
+            'name': 'MQTT Connector',
+            'type': 'mqtt',
+            'configuration': 'mqtt.json',
+            'logLevel': 'INFO',
+            'configurationJson': {'broker': {'host': 'localhost'}}
+        })
+
+        connector = self.remote_configurator._connectors_by_name['MQTT Connector']
+        self.assertIs(connector, self.config['connectors'][0])
+        self.assertEqual(connector['configuration'], 'mqtt.json')
+        self.assertTrue(path.exists(self.config_path + 'mqtt.json'))
+
+        self.remote_configurator._delete_connectors_from_config([])
+
+        self.assertEqual(self.config['connectors'], [])
+        self.assertEqual(self.remote_configurator._connectors_by_name, {})
+
+
+    def test_version_sent_after_default_connectors_configs(self):
+        send_attributes = self.gateway.tb_client.client.send_attributes
+        send_attributes.reset_mock()
+        self.gateway.version = {'current_version': '3.4'}
+
+        def check_version_not_sent():
+            self.assertFalse(any('Version' in call[0][0] for call in send_attributes.call_args_list))
+
+        self.remote_configurator._send_default_connectors_config = MagicMock(side_effect=check_version_not_sent)
+
+        self.remote_configurator.send_current_configuration()
+
+        self.remote_configurator._send_default_connectors_config.assert_called_once()
+        self.assertIn({'Version': '3.4'}, [call[0][0] for call in send_attributes.call_args_list])
+
+
+    def test_remote_format_does_not_modify_general_configuration(self):
+        commands = [{'attributeOnGateway': 'cpu', 'command': 'uptime', 'timeout': 1}]
+        _atomic_write_json(self.config_path + 'statistics.json', commands)
+        self.config['thingsboard']['statistics']['configuration'] = 'statistics.json'
+
+        remote_config = self.remote_configurator._get_general_config_in_remote_format()
+
+        self.assertEqual(remote_config['statistics']['commands'], commands)
+        self.assertNotIn('commands', self.config['thingsboard']['statistics'])
+
+
+    def test_statistics_caches_invalidated_after_commands_rewrite(self):
+        file_path = self.config_path + 'statistics.json'
+        old_commands = [{'attributeOnGateway': 'cpu', 'command': 'uptime', 'timeout': 1}]
+        new_commands = [{'attributeOnGateway': 'memory', 'command': 'free', 'timeout': 1}]
+        _atomic_write_json(file_path, old_commands)
+        self.config['thingsboard']['statistics']['configuration'] = 'statistics.json'
+        statistics = {**self.config['thingsboard']['statistics'], 'commands': new_commands}
+
+        self.assertTrue(self.remote_configurator._check_statistics_configuration_changes(statistics))
+        self.assertEqual(self.remote_configurator._read_json_cached(file_path), old_commands)
+
+        mtime = os.stat(file_path).st_mtime_ns
+        self.assertTrue(self.remote_configurator._apply_statistics_config(statistics))
+        # the same modification time makes only explicit invalidation refresh the caches
+        os.utime(file_path, ns=(mtime, mtime))
+
+        self.assertFalse(self.remote_configurator._check_statistics_configuration_changes(statistics))
+        self.assertEqual(self.remote_configurator._read_json_cached(file_path), new_commands)
+
+    def test_read_json_cached_returns_independent_objects(self):
+        file_path = self.config_path + 'statistics.json'
+        _atomic_write_json(file_path, [{'command': 'uptime'}])
+
+        self.remote_configurator._read_json_cached(file_path)[0]['command'] = 'free'
+
+        self.assertEqual(self.remote_configurator._read_json_cached(file_path), [{'command': 'uptime'}])
+
+
+    def test_grpc_non_server_field_change_does_not_reload_connectors(self):
+        self.remote_configurator._handle_grpc_configuration_update({'enabled': False, 'customField': 1})
+
+        self.gateway.init_grpc_service.assert_not_called()
+        self.gateway.load_connectors.assert_not_called()
+        self.assertEqual(self.config['grpc'], {'enabled': False, 'customField': 1})
+        self.assertTrue(self.remote_configurator._config_dirty)
+
+    def test_grpc_server_field_change_reloads_connectors(self):
+        config = {'enabled': False, 'serverPort': 9596}
+
+        self.remote_configurator._handle_grpc_configuration_update(config)
+
+        self.gateway.init_grpc_service.assert_called_once_with(config)
+        self.gateway.load_connectors.assert_called_once()
+        self.assertEqual(self.config['grpc'], config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#      Copyright 2023. ThingsBoard
+#  #
+#      Licensed under the Apache License, Version 2.0 (the "License");
+#      you may not use this file except in compliance with the License.
+#      You may obtain a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#      Unless required by applicable law or agreed to in writing, software
+#      distributed under the License is distributed on an "AS IS" BASIS,
+#      WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#      See the License for the specific language governing permissions and
+#      limitations under the License.
+
+import unittest
+from threading import Event
+from unittest.mock import MagicMock
+
+from thingsboard_gateway.gateway.tb_client import TBClient
+
+
+class TestTBClientConnectionWaiting(unittest.TestCase):
+    def setUp(self):
+        # skipping TBClient.__init__ to avoid MQTT client creation and thread start
+        self.tb_client = TBClient.__new__(TBClient)
+        self.tb_client.client = MagicMock()
+        self.tb_client._TBClient__is_connected = False
+        self.tb_client._TBClient__connected_event = Event()
+
+    def test_wait_for_connection(self):
+        self.assertFalse(self.tb_client.wait_for_connection(timeout=0))
+
+        self.tb_client._on_connect(MagicMock(), None, None, 0)
+        self.assertTrue(self.tb_client.wait_for_connection(timeout=0))
+
+        self.tb_client.client._client = client = MagicMock()
+        self.tb_client._on_disconnect(client, None, 0)
+        self.assertFalse(self.tb_client.wait_for_connection(timeout=0))
+
+    def test_failed_connect_does_not_release_waiting(self):
+        self.tb_client._on_connect(MagicMock(), None, None, 5)
+        self.assertFalse(self.tb_client.wait_for_connection(timeout=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+#      Copyright 2023. ThingsBoard
+#  #
+#      Licensed under the Apache License, Version 2.0 (the "License");
+#      you may not use this file except in compliance with the License.
+#      You may obtain a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#      Unless required by applicable law or agreed to in writing, software
+#      distributed under the License is distributed on an "AS IS" BASIS,
+#      WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#      See the License for the specific language governing permissions and
+#      limitations under the License.
+
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from thingsboard_gateway.tb_utility.tb_json import dump, dumps, load
+
+
+class TestTBJson(unittest.TestCase):
+    def test_dumps_is_indented_bytes(self):
+        self.assertEqual(dumps({'a': 1}), b'{\n  "a": 1\n}')
+
+    def test_dump_and_load_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, 'test.json')
+            with open(file_path, 'wb') as file:
+                dump({'a': [1, 2]}, file)
+
+            with open(file_path, 'rb') as file:
+                self.assertEqual(load(file), {'a': [1, 2]})
+
+
+if __name__ == '__main__':
+    unittest.main()
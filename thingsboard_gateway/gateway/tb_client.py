@@ -52,6 +52,7 @@ class TBClient(threading.Thread):
         self.__username = None
         self.__password = None
         self.__is_connected = False
+        self.__connected_event = threading.Event()
         self.__stopped = False
         self.__paused = False
         self._last_cert_check_time = 0
@@ -205,10 +206,14 @@ class TBClient(threading.Thread):
     def is_connected(self):
         return self.__is_connected
 
+    def wait_for_connection(self, timeout=None):
+        return self.__connected_event.wait(timeout)
+
     def _on_connect(self, client, userdata, flags, result_code, *extra_params):
         log.debug('TB client %s connected to ThingsBoard', str(client))
         if result_code == 0:
             self.__is_connected = True
+            self.__connected_event.set()
         # pylint: disable=protected-access
         self.client._on_connect(client, userdata, flags, result_code, *extra_params)
 
@@ -220,6 +225,7 @@ class TBClient(threading.Thread):
             client.loop_stop()
         else:
             self.__is_connected = False
+            self.__connected_event.clear()
             self.client._on_disconnect(client, userdata, result_code)
 
     def stop(self):
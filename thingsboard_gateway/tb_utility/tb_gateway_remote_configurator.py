@@ -13,33 +13,114 @@
 #     limitations under the License.
 
 import os.path
+from contextlib import suppress
+from functools import lru_cache
+from hashlib import blake2b
+from shutil import copymode
+from threading import Event
 from logging import getLogger
-from time import sleep, time
+from time import time, time_ns
 from logging.config import dictConfig
 
-from regex import fullmatch
-from simplejson import dumps, load
+import regex
 from packaging import version
 
 from thingsboard_gateway.gateway.tb_client import TBClient
 from thingsboard_gateway.tb_utility.tb_handler import TBLoggerHandler
+from thingsboard_gateway.tb_utility.tb_json import OPT_SORT_KEYS, dumps, load, loads
 
 LOG = getLogger("service")
 
+# any attribute that isn't handled by name is treated as a connector configuration
+CONNECTOR_ATTRIBUTE_NAME_PATTERN = regex.compile(r'(?=\D*\d?).*', flags=regex.V1)
+
+
+def _canon_hash(obj):
+    """
+    Returns a key-order independent hash of JSON-serializable object
+    """
+
+    return blake2b(dumps(obj, option=OPT_SORT_KEYS), digest_size=16).digest()
+
+
+def _section_fingerprint(config, fields):
+    """
+    fields - mapping of the section keys to values that are used when the key is absent in config
+    """
+
+    return _canon_hash({key: config.get(key, default) for (key, default) in fields.items()})
+
+
+@lru_cache(maxsize=8)
+def _read_file_bytes(file_path, mtime):
+    """
+    Cached by (file_path, mtime), so the cache entry is not used anymore once the file is modified.
+    Raw bytes are cached instead of parsed object, so callers always get their own object from `loads`.
+    """
+
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+@lru_cache(maxsize=8)
+def _file_fingerprint(file_path, mtime):
+    return _canon_hash(loads(_read_file_bytes(file_path, mtime)))
+
+
+def _atomic_write_json(file_path, obj):
+    """
+    Writes JSON to a temporary file and replaces the target file with it, so the target is never left half-written
+    """
+
+    data = dumps(obj)
+    tmp_file_path = file_path + '.tmp'
+    try:
+        with os.fdopen(os.open(tmp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        with suppress(FileNotFoundError):
+            copymode(file_path, tmp_file_path)
+        os.replace(tmp_file_path, file_path)
+    except Exception:
+        with suppress(OSError):
+            os.remove(tmp_file_path)
+        raise
+
 
 class RemoteConfigurator:
     DEFAULT_STATISTICS = {
         'enable': True,
         'statsSendPeriodInSeconds': 3600
     }
+    # fields that gateway adds to loaded connectors configurations for hot reload, they aren't serializable
+    CONNECTOR_RUNTIME_FIELDS = ('config_updated', 'config_file_path')
+    # GRPC configuration fields used on GRPC server creation, changing any of them requires connectors reloading
+    GRPC_SERVER_FIELDS = ('enabled', 'serverPort', 'keepaliveTimeMs', 'keepaliveTimeoutMs',
+                          'keepalivePermitWithoutCalls', 'maxPingsWithoutData', 'minTimeBetweenPingsMs',
+                          'minPingIntervalWithoutDataMs')
+    # general configuration sections (key -> default value),
+    # each section is compared as a whole on general configuration update
+    GENERAL_CONFIGURATION_SECTIONS = {
+        'connection': {'host': None, 'port': None, 'security': None, 'provisioning': {}, 'qos': None},
+        'deviceFiltering': {'deviceFiltering': None},
+        'remoteShell': {'remoteShell': None}
+    }
 
     def __init__(self, gateway, config):
         self._gateway = gateway
+        # gateway configuration folder is set once on gateway start
+        self._cfg_path = gateway.get_config_path()
         self._config = config
         self._load_connectors_configuration()
         self._logs_configuration = self._load_logs_configuration()
         self.in_process = False
+        # set by handlers when tb_gateway.json has to be rewritten, the file is saved once per config request
+        self._config_dirty = False
         self._active_connectors = []
+        # fingerprints of the current general configuration sections, calculated lazily
+        self._section_fp = {}
         self._handlers = {
             'general_configuration': self._handle_general_configuration_update,
             'storage_configuration': self._handle_storage_configuration_update,
@@ -47,13 +128,17 @@ class RemoteConfigurator:
             'logs_configuration': self._handle_logs_configuration_update,
             'active_connectors': self._handle_active_connectors_update,
             'RemoteLoggingLevel': self._handle_remote_logging_level_update,
-            r'(?=\D*\d?).*': self._handle_connector_configuration_update,
         }
+        # checked in order only for attributes without a handler in self._handlers
+        self._pattern_handlers = [
+            (CONNECTOR_ATTRIBUTE_NAME_PATTERN, self._handle_connector_configuration_update),
+        ]
         self._modifiable_static_attrs = {
             'logs_configuration': 'logs.json'
         }
 
         self._remote_gateway_version = None
+        self._remote_version_ready = Event()
         self._fetch_remote_gateway_version()
 
         LOG.info('Remote Configurator started')
@@ -84,24 +169,31 @@ class RemoteConfigurator:
         self._config.get('grpc', {}).update(config)
 
     @property
-    def connectors_configuration(self):
-        connectors = self._config.get('connectors', [])
-        for connector in connectors:
-            connector.pop('config_updated', None)
-            connector.pop('config_file_path', None)
-        return connectors
+    def _connectors_raw(self):
+        return self._config.get('connectors', [])
+
+    def _clean_connectors_snapshot(self):
+        """
+        Returns copies of connectors configurations without gateway runtime fields, use it for sending or saving
+        """
+
+        return [{key: value for (key, value) in connector.items() if key not in self.CONNECTOR_RUNTIME_FIELDS}
+                for connector in self._connectors_raw]
 
     def _fetch_remote_gateway_version(self):
         def callback(key, err):
-            if err is not None:
-                LOG.exception(err)
-                self._remote_gateway_version = '0.0'
-
             try:
-                self._remote_gateway_version = key['client']['Version']
-            except KeyError as e:
-                self._remote_gateway_version = '0.0'
-                LOG.exception('Remote version number error (setting to 0.0): %s', e)
+                if err is not None:
+                    LOG.exception(err)
+                    self._remote_gateway_version = '0.0'
+
+                try:
+                    self._remote_gateway_version = key['client']['Version']
+                except KeyError as e:
+                    self._remote_gateway_version = '0.0'
+                    LOG.exception('Remote version number error (setting to 0.0): %s', e)
+            finally:
+                self._remote_version_ready.set()
 
         self._gateway.tb_client.client.request_attributes(client_keys=['Version'], callback=callback)
 
@@ -115,21 +207,18 @@ class RemoteConfigurator:
         # remote gateway version fetching in __init__ method (_fetch_remote_gateway_version)
         LOG.info('Waiting for remote gateway version...')
 
-        try_count = 1
-        while not self._remote_gateway_version and try_count <= 3:
-            try_count += 1
-            sleep(1)
+        self._remote_version_ready.wait(timeout=3)
 
         need_update_configs = version.parse(self._gateway.version.get('current_version', '0.0')) > version.parse(
             str(self._remote_gateway_version))
 
         if need_update_configs:
-            default_connectors_configs_folder_path = self._gateway.get_config_path() + 'default-configs/'
+            default_connectors_configs_folder_path = self._cfg_path + 'default-configs/'
 
             for (connector_type, _) in DEFAULT_CONNECTORS.items():
                 connector_filename = connector_type + '.json'
                 try:
-                    with open(default_connectors_configs_folder_path + connector_filename, 'r') as file:
+                    with open(default_connectors_configs_folder_path + connector_filename, 'rb') as file:
                         config = load(file)
                         self._gateway.tb_client.client.send_attributes({connector_type.upper() + '_DEFAULT_CONFIG': config})
                         LOG.debug('Default config for %s connector sent.', connector_type)
@@ -137,7 +226,7 @@ class RemoteConfigurator:
                     LOG.error('Default config file for %s connector not found! Passing...', connector_type)
 
     def _get_active_connectors(self):
-        return [connector['name'] for connector in self.connectors_configuration]
+        return [connector['name'] for connector in self._connectors_raw]
 
     def _get_general_config_in_local_format(self):
         """
@@ -147,7 +236,7 @@ class RemoteConfigurator:
 
         connectors_config = [
             {'type': connector['type'], 'name': connector['name'], 'configuration': connector['configuration']} for
-            connector in self.connectors_configuration]
+            connector in self._connectors_raw]
 
         return {
             'thingsboard': self.general_configuration,
@@ -162,23 +251,21 @@ class RemoteConfigurator:
         !!!Don't use it for saving data to conf files (use `_get_general_config_in_local_format`)!!!
         """
 
-        stat_conf_path = self.general_configuration['statistics'].get('configuration')
+        statistics = self.general_configuration['statistics']
+        stat_conf_path = statistics.get('configuration')
         commands = []
         if stat_conf_path:
-            with open(self._gateway.get_config_path() + stat_conf_path, 'r') as file:
-                commands = load(file)
-        config = self.general_configuration
-        config.update(
-            {
-                'statistics': {
-                    'enable': self.general_configuration['statistics']['enable'],
-                    'statsSendPeriodInSeconds': self.general_configuration['statistics']['statsSendPeriodInSeconds'],
-                    'configuration': self.general_configuration['statistics'].get('configuration'),
-                    'commands': commands
-                }
+            commands = self._read_json_cached(self._cfg_path + stat_conf_path)
+
+        return {
+            **self.general_configuration,
+            'statistics': {
+                'enable': statistics['enable'],
+                'statsSendPeriodInSeconds': statistics['statsSendPeriodInSeconds'],
+                'configuration': stat_conf_path,
+                'commands': commands
             }
-        )
-        return config
+        }
 
     def send_current_configuration(self):
         """
@@ -187,28 +274,35 @@ class RemoteConfigurator:
         """
 
         LOG.debug('Sending all configurations (init)')
-        self._gateway.tb_client.client.send_attributes(
-            {'general_configuration': self._get_general_config_in_remote_format()})
-        self._gateway.tb_client.client.send_attributes({'storage_configuration': self.storage_configuration})
-        self._gateway.tb_client.client.send_attributes({'grpc_configuration': self.grpc_configuration})
-        self._gateway.tb_client.client.send_attributes(
-            {'logs_configuration': {**self._logs_configuration, 'ts': int(time() * 1000)}})
-        self._gateway.tb_client.client.send_attributes({'active_connectors': self._get_active_connectors()})
+        ts = time_ns() // 1_000_000
+        configuration = {
+            'general_configuration': self._get_general_config_in_remote_format(),
+            'storage_configuration': self.storage_configuration,
+            'grpc_configuration': self.grpc_configuration,
+            'logs_configuration': {**self._logs_configuration, 'ts': ts},
+            'active_connectors': self._get_active_connectors()
+        }
+        self._gateway.tb_client.client.send_attributes(configuration)
         self._send_default_connectors_config()
+        # Version is sent only after default configs check, that compares current version with the remote one
         self._gateway.tb_client.client.send_attributes({'Version': self._gateway.version.get('current_version', '0.0')})
-        for connector in self.connectors_configuration:
+
+        # connectors configurations can be large, so each one is sent separately to stay within payload limits
+        for connector in self._clean_connectors_snapshot():
             self._gateway.tb_client.client.send_attributes(
                 {connector['name']: {**connector, 'logLevel': connector['configurationJson'].get('logLevel', 'INFO'),
-                                     'ts': int(time() * 1000)}})
+                                     'ts': ts}})
 
     def _load_connectors_configuration(self):
+        self._connectors_by_name = {connector['name']: connector for connector in self._config.get('connectors', [])}
         for (_, connector_list) in self._gateway.connectors_configs.items():
             for connector in connector_list:
-                for general_connector_config in self.connectors_configuration:
-                    if general_connector_config['name'] == connector['name']:
-                        config = connector.pop('config')[general_connector_config['configuration']]
-                        general_connector_config.update(connector)
-                        general_connector_config['configurationJson'] = config
+                general_connector_config = self._connectors_by_name.get(connector['name'])
+                if general_connector_config is not None:
+                    config = connector.pop('config')[general_connector_config['configuration']]
+                    general_connector_config.update({key: value for (key, value) in connector.items()
+                                                     if key not in self.CONNECTOR_RUNTIME_FIELDS})
+                    general_connector_config['configurationJson'] = config
 
     def _load_logs_configuration(self):
         """
@@ -216,8 +310,7 @@ class RemoteConfigurator:
         """
 
         try:
-            with open(self._gateway.get_config_path() + 'logs.json', 'r') as logs:
-                return load(logs)
+            return self._read_json_cached(self._cfg_path + 'logs.json')
         except Exception as e:
             LOG.exception(e)
             return {}
@@ -229,25 +322,46 @@ class RemoteConfigurator:
             self.in_process = True
 
             try:
+                # file modification times shared between all attributes of the request
+                stat_cache = {}
                 for attr_name in config.keys():
                     if 'deleted' in attr_name:
                         continue
 
                     request_config = config[attr_name]
-                    if not self._is_modified(attr_name, request_config):
+                    if not self._is_modified(attr_name, request_config, stat_cache):
                         continue
 
-                    for (name, func) in self._handlers.items():
-                        if fullmatch(name, attr_name):
-                            func(request_config)
-                            break
+                    func = self._handlers.get(attr_name)
+                    if func is None:
+                        for (pattern, pattern_func) in self._pattern_handlers:
+                            if pattern.fullmatch(attr_name):
+                                func = pattern_func
+                                break
+
+                    if func is not None:
+                        func(request_config)
             except (KeyError, AttributeError):
                 LOG.error('Unknown attribute update name (Available: %s)', ', '.join(self._handlers.keys()))
             finally:
+                # changes of the handlers that completed before a failure are saved too
+                self._save_config_if_dirty()
                 self.in_process = False
         else:
             LOG.error("Remote configuration is already in processing")
 
+    def _save_config_if_dirty(self):
+        if not self._config_dirty:
+            return
+
+        config_file_path = self._cfg_path + 'tb_gateway.json'
+        try:
+            _atomic_write_json(config_file_path, self._get_general_config_in_local_format())
+            self._config_dirty = False
+        except Exception as e:
+            LOG.error('Failed to save general configuration to %s', config_file_path)
+            LOG.exception(e)
+
     # HANDLERS ---------------------------------------------------------------------------------------------------------
     def _handle_general_configuration_update(self, config):
         """
@@ -270,10 +384,7 @@ class RemoteConfigurator:
         LOG.info('Processing general configuration update')
 
         LOG.info('--- Checking connection configuration changes...')
-        if config['host'] != self.general_configuration['host'] or config['port'] != self.general_configuration[
-            'port'] or config['security'] != self.general_configuration['security'] or config.get('provisioning',
-                                                                                                  {}) != self.general_configuration.get(
-                'provisioning', {}) or config['qos'] != self.general_configuration['qos']:
+        if self._is_general_configuration_section_changed('connection', config):
             LOG.info('---- Connection configuration changed. Processing...')
             success = self._apply_connection_config(config)
             if not success:
@@ -292,7 +403,7 @@ class RemoteConfigurator:
             LOG.info('--- Statistics configuration not changed.')
 
         LOG.info('--- Checking device filtering configuration changes...')
-        if config.get('deviceFiltering') != self.general_configuration.get('deviceFiltering'):
+        if self._is_general_configuration_section_changed('deviceFiltering', config):
             LOG.info('---- Device filtering configuration changed. Processing...')
             success = self._apply_device_filtering_config(config)
             if not success:
@@ -301,7 +412,7 @@ class RemoteConfigurator:
             LOG.info('--- Device filtering configuration not changed.')
 
         LOG.info('--- Checking Remote Shell configuration changes...')
-        if config.get('remoteShell') != self.general_configuration.get('remoteShell'):
+        if self._is_general_configuration_section_changed('remoteShell', config):
             LOG.info('---- Remote Shell configuration changed. Processing...')
             success = self._apply_remote_shell_config(config)
             if not success:
@@ -313,12 +424,16 @@ class RemoteConfigurator:
         self._apply_other_params_config(config)
 
         LOG.info('--- Saving new general configuration...')
-        self.general_configuration = config
-        self._gateway.tb_client.client.send_attributes({'general_configuration': self.general_configuration})
-        self._cleanup()
-        with open(self._gateway.get_config_path() + "tb_gateway.json", "w",
-                  encoding="UTF-8") as file:
-            file.writelines(dumps(self._get_general_config_in_local_format(), indent='  '))
+        # statistics commands are stored in a separate file, so they are kept out of the general configuration
+        statistics = config.get('statistics', self.DEFAULT_STATISTICS)
+        self.general_configuration = {
+            **config,
+            'statistics': {key: value for (key, value) in statistics.items() if key != 'commands'}
+        }
+        self._section_fp.clear()
+        self._gateway.tb_client.client.send_attributes(
+            {'general_configuration': self._get_general_config_in_remote_format()})
+        self._config_dirty = True
 
     def _handle_storage_configuration_update(self, config):
         LOG.debug('Processing storage configuration update...')
@@ -333,8 +448,7 @@ class RemoteConfigurator:
             self._gateway._event_storage = old_event_storage
         else:
             self.storage_configuration = config
-            with open(self._gateway.get_config_path() + "tb_gateway.json", "w", encoding="UTF-8") as file:
-                file.writelines(dumps(self._get_general_config_in_local_format(), indent='  '))
+            self._config_dirty = True
             self._gateway.tb_client.client.send_attributes({'storage_configuration': self.storage_configuration})
 
             LOG.info('Processed storage configuration update successfully')
@@ -342,34 +456,39 @@ class RemoteConfigurator:
     def _handle_grpc_configuration_update(self, config):
         LOG.debug('Processing GRPC configuration update...')
         if config != self.grpc_configuration:
-            try:
-                self._gateway.init_grpc_service(config)
-                for connector_name in self._gateway.available_connectors:
-                    self._gateway.available_connectors[connector_name].close()
-                self._gateway.load_connectors(self._get_general_config_in_local_format())
-                self._gateway.connect_with_connectors()
-            except Exception as e:
-                LOG.error('Something went wrong with applying the new GRPC configuration. Reverting...')
-                LOG.exception(e)
-                self._gateway.init_grpc_service(self.grpc_configuration)
-                for connector_name in self._gateway.available_connectors:
-                    self._gateway.available_connectors[connector_name].close()
-                self._gateway.load_connectors(self._get_general_config_in_local_format())
-                self._gateway.connect_with_connectors()
+            grpc_server_fields = dict.fromkeys(self.GRPC_SERVER_FIELDS)
+            if _section_fingerprint(config, grpc_server_fields) == _section_fingerprint(self.grpc_configuration,
+                                                                                        grpc_server_fields):
+                LOG.info('GRPC server configuration not changed, connectors will not be reloaded')
             else:
-                self.grpc_configuration = config
-                with open(self._gateway.get_config_path() + "tb_gateway.json", "w", encoding="UTF-8") as file:
-                    file.writelines(dumps(self._get_general_config_in_local_format(), indent='  '))
-                self._gateway.tb_client.client.send_attributes({'grpc_configuration': self.grpc_configuration})
+                try:
+                    self._gateway.init_grpc_service(config)
+                    for connector_name in self._gateway.available_connectors:
+                        self._gateway.available_connectors[connector_name].close()
+                    self._gateway.load_connectors(self._get_general_config_in_local_format())
+                    self._gateway.connect_with_connectors()
+                except Exception as e:
+                    LOG.error('Something went wrong with applying the new GRPC configuration. Reverting...')
+                    LOG.exception(e)
+                    self._gateway.init_grpc_service(self.grpc_configuration)
+                    for connector_name in self._gateway.available_connectors:
+                        self._gateway.available_connectors[connector_name].close()
+                    self._gateway.load_connectors(self._get_general_config_in_local_format())
+                    self._gateway.connect_with_connectors()
+                    return
+
+            self.grpc_configuration = config
+            self._config_dirty = True
+            self._gateway.tb_client.client.send_attributes({'grpc_configuration': self.grpc_configuration})
 
-                LOG.info('Processed GRPC configuration update successfully')
+            LOG.info('Processed GRPC configuration update successfully')
 
     def _handle_logs_configuration_update(self, config):
         global LOG
         LOG.debug('Processing logs configuration update...')
         try:
             LOG = getLogger('service')
-            logs_conf_file_path = self._gateway.get_config_path() + 'logs.json'
+            logs_conf_file_path = self._cfg_path + 'logs.json'
 
             dictConfig(config)
             LOG = getLogger('service')
@@ -378,8 +497,8 @@ class RemoteConfigurator:
             self._gateway.main_handler.setTarget(self._gateway.remote_handler)
             LOG.addHandler(self._gateway.remote_handler)
 
-            with open(logs_conf_file_path, 'w') as logs:
-                logs.write(dumps(config, indent='  '))
+            _atomic_write_json(logs_conf_file_path, config)
+            _read_file_bytes.cache_clear()
 
             LOG.debug("Logs configuration has been updated.")
             self._gateway.tb_client.client.send_attributes({'logs_configuration': config})
@@ -406,8 +525,7 @@ class RemoteConfigurator:
                 self._gateway.available_connectors.pop(name)
 
             self._delete_connectors_from_config(config)
-            with open(self._gateway.get_config_path() + 'tb_gateway.json', 'w') as file:
-                file.writelines(dumps(self._get_general_config_in_local_format(), indent='  '))
+            self._config_dirty = True
             self._active_connectors = config
 
         self._gateway.tb_client.client.send_attributes({'active_connectors': config})
@@ -433,8 +551,8 @@ class RemoteConfigurator:
         try:
             config_file_name = config['configuration']
 
-            found_connectors = list(filter(lambda item: item['name'] == config['name'], self.connectors_configuration))
-            if not found_connectors:
+            found_connector = self._connectors_by_name.get(config['name'])
+            if found_connector is None:
                 connector_configuration = {'name': config['name'], 'type': config['type'],
                                            'configuration': config_file_name}
                 if config.get('key'):
@@ -443,28 +561,27 @@ class RemoteConfigurator:
                 if config.get('class'):
                     connector_configuration['class'] = config['class']
 
-                with open(self._gateway.get_config_path() + config_file_name, 'w') as file:
-                    config['configurationJson'].update({'logLevel': config['logLevel'], 'name': config['name']})
-                    self.create_configuration_file_backup(config, config_file_name)
-                    file.writelines(dumps(config['configurationJson'], indent='  '))
+                config['configurationJson'].update({'logLevel': config['logLevel'], 'name': config['name']})
+                self.create_configuration_file_backup(config, config_file_name)
+                _atomic_write_json(self._cfg_path + config_file_name, config['configurationJson'])
 
-                self.connectors_configuration.append(connector_configuration)
-                with open(self._gateway.get_config_path() + 'tb_gateway.json', 'w') as file:
-                    file.writelines(dumps(self._get_general_config_in_local_format(), indent='  '))
+                self._config.setdefault('connectors', []).append(connector_configuration)
+                self._connectors_by_name[connector_configuration['name']] = connector_configuration
+                self._config_dirty = True
 
                 self._gateway.load_connectors(self._get_general_config_in_local_format())
                 self._gateway.connect_with_connectors()
             else:
-                found_connector = found_connectors[0]
                 changed = False
 
-                config_file_path = self._gateway.get_config_path() + config_file_name
-                if os.path.exists(config_file_path):
-                    with open(config_file_path, 'r') as file:
+                config_file_path = self._cfg_path + config_file_name
+                try:
+                    with open(config_file_path, 'rb') as file:
                         connector_config_data = load(file)
-                        config_hash = hash(str(connector_config_data))
-
-                    if config_hash != hash(str(config['configurationJson'])):
+                except FileNotFoundError:
+                    pass
+                else:
+                    if _canon_hash(connector_config_data) != _canon_hash(config['configurationJson']):
                         self.create_configuration_file_backup(connector_config_data, config_file_name)
                         changed = True
 
@@ -486,9 +603,8 @@ class RemoteConfigurator:
                     found_connector.update(connector_configuration)
 
                 if changed:
-                    with open(self._gateway.get_config_path() + config_file_name, 'w') as file:
-                        config['configurationJson'].update({'logLevel': config['logLevel'], 'name': config['name']})
-                        file.writelines(dumps(config['configurationJson'], indent='  '))
+                    config['configurationJson'].update({'logLevel': config['logLevel'], 'name': config['name']})
+                    _atomic_write_json(self._cfg_path + config_file_name, config['configurationJson'])
 
                     if connector_configuration is None:
                         connector_configuration = found_connector
@@ -508,7 +624,6 @@ class RemoteConfigurator:
 
     # HANDLERS SUPPORT METHODS -----------------------------------------------------------------------------------------
     def _apply_connection_config(self, config) -> bool:
-        apply_start = time() * 1000
         old_tb_client = self._gateway.tb_client
         try:
             old_tb_client.disconnect()
@@ -519,10 +634,7 @@ class RemoteConfigurator:
             while not connection_state:
                 for client in (new_tb_client, old_tb_client):
                     client.connect()
-                    while time() * 1000 - apply_start >= 1000 and not connection_state:
-                        connection_state = client.is_connected()
-                        sleep(.1)
-
+                    connection_state = client.wait_for_connection(timeout=1)
                     if connection_state:
                         self._gateway.tb_client = client
                         self._gateway.subscribe_to_required_topics()
@@ -537,7 +649,7 @@ class RemoteConfigurator:
             LOG.info("Remote general configuration will be restored.")
             self._gateway.tb_client.disconnect()
             self._gateway.tb_client.stop()
-            self._gateway.tb_client = TBClient(self.general_configuration, self._gateway.get_config_path())
+            self._gateway.tb_client = TBClient(self.general_configuration, self._cfg_path)
             self._gateway.tb_client.connect()
             self._gateway.subscribe_to_required_topics()
             LOG.debug("%s connection has been restored", str(self._gateway.tb_client.client))
@@ -554,12 +666,15 @@ class RemoteConfigurator:
                 if statistics_conf_file_name is None:
                     statistics_conf_file_name = 'statistics.json'
 
-                with open(self._gateway.get_config_path() + statistics_conf_file_name, 'w') as file:
-                    file.writelines(dumps(commands, indent='  '))
+                statistics_conf_file_path = self._cfg_path + statistics_conf_file_name
+                _atomic_write_json(statistics_conf_file_path, commands)
+                _read_file_bytes.cache_clear()
+                _file_fingerprint.cache_clear()
                 config['configuration'] = statistics_conf_file_name
 
             self._gateway.init_statistics_service(config)
-            self.general_configuration['statistics'] = config
+            self.general_configuration['statistics'] = {key: value for (key, value) in config.items()
+                                                        if key != 'commands'}
             return True
         except Exception as e:
             LOG.error('Something went wrong with applying the new statistics configuration. Reverting...')
@@ -593,8 +708,10 @@ class RemoteConfigurator:
         self._gateway.config['thingsboard'].update(config)
 
     def _delete_connectors_from_config(self, connector_list):
-        self._config['connectors'] = list(
-            filter(lambda connector: connector['name'] in connector_list, self.connectors_configuration))
+        keep = set(connector_list)
+        self._config['connectors'] = [connector for connector in self._connectors_raw
+                                      if connector['name'] in keep]
+        self._connectors_by_name = {connector['name']: connector for connector in self._config['connectors']}
 
     def _check_statistics_configuration_changes(self, config):
         general_statistics_config = self.general_configuration.get('statistics', self.DEFAULT_STATISTICS)
@@ -602,20 +719,32 @@ class RemoteConfigurator:
                 general_statistics_config['statsSendPeriodInSeconds']:
             return True
 
-        commands = []
+        commands_fp = _canon_hash([])
         if general_statistics_config.get('configuration'):
-            with open(self._gateway.get_config_path() + general_statistics_config['configuration'], 'r') as file:
-                commands = load(file)
+            file_path = self._cfg_path + general_statistics_config['configuration']
+            commands_fp = _file_fingerprint(file_path, os.stat(file_path).st_mtime_ns)
 
-        if config.get('commands', []) != commands:
-            return True
+        return _canon_hash(config.get('commands', [])) != commands_fp
+
+    def _is_general_configuration_section_changed(self, section, config):
+        fields = self.GENERAL_CONFIGURATION_SECTIONS[section]
+        current_fingerprint = self._section_fp.get(section)
+        if current_fingerprint is None:
+            current_fingerprint = _section_fingerprint(self.general_configuration, fields)
+            self._section_fp[section] = current_fingerprint
+
+        return _section_fingerprint(config, fields) != current_fingerprint
 
-        return False
+    @staticmethod
+    def _read_json_cached(file_path):
+        """
+        Returns parsed content of the JSON file,
+        the file is re-read only if its modification time has changed
+        """
 
-    def _cleanup(self):
-        self.general_configuration['statistics'].pop('commands')
+        return loads(_read_file_bytes(file_path, os.stat(file_path).st_mtime_ns))
 
-    def _is_modified(self, attr_name, config):
+    def _is_modified(self, attr_name, config, stat_cache=None):
         try:
             file_path = config.get('configuration') or self._modifiable_static_attrs.get(attr_name)
         except AttributeError:
@@ -626,9 +755,17 @@ class RemoteConfigurator:
         if file_path is None:
             return True
 
+        if stat_cache is None:
+            stat_cache = {}
+
         try:
-            file_path = self._gateway.get_config_path() + file_path
-            if config.get('ts', 0) <= int(os.path.getmtime(file_path) * 1000):
+            file_path = self._cfg_path + file_path
+            mtime_ms = stat_cache.get(file_path)
+            if mtime_ms is None:
+                mtime_ms = os.stat(file_path).st_mtime_ns // 1_000_000
+                stat_cache[file_path] = mtime_ms
+
+            if config.get('ts', 0) <= mtime_ms:
                 return False
         except OSError:
             LOG.warning('File %s not exist', file_path)
@@ -636,12 +773,10 @@ class RemoteConfigurator:
         return True
 
     def create_configuration_file_backup(self, config_data, config_file_name):
-        backup_folder_path = self._gateway.get_config_path() + "backup"
-        if not os.path.exists(backup_folder_path):
-            os.mkdir(backup_folder_path)
+        backup_folder_path = self._cfg_path + "backup"
+        os.makedirs(backup_folder_path, exist_ok=True)
 
         backup_file_path = backup_folder_path + os.path.sep + config_file_name + "_backup_" + str(int(time()))
-        with open(backup_file_path, "w") as backup_file:
-            LOG.debug(f"Backup file created for configuration file {config_file_name} in {backup_file_path}")
-            backup_file.writelines(dumps(config_data, indent='  '))
+        _atomic_write_json(backup_file_path, config_data)
+        LOG.debug(f"Backup file created for configuration file {config_file_name} in {backup_file_path}")
             
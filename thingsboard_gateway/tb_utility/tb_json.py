@@ -0,0 +1,34 @@
+#     Copyright 2023. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+"""
+Thin orjson-backed JSON helpers for configuration files.
+orjson works with bytes, so files have to be opened in binary mode ('rb'/'wb').
+"""
+
+from orjson import OPT_INDENT_2, OPT_SORT_KEYS, dumps as orjson_dumps, loads
+
+__all__ = ['loads', 'dumps', 'load', 'dump', 'OPT_SORT_KEYS']
+
+
+def dumps(obj, option=OPT_INDENT_2) -> bytes:
+    return orjson_dumps(obj, option=option)
+
+
+def load(file):
+    return loads(file.read())
+
+
+def dump(obj, file):
+    file.write(dumps(obj))